@@ -146,6 +146,36 @@ class BinanceClient:
         
         return self._handle_request("POST", url, headers=self.headers)
 
+    def get_user_trades(self, symbol: str, order_id: int = None, from_id: int = None, limit: int = 100) -> List[Dict]:
+        """Fetches account trades (fills) for a symbol, for one order or from a trade id."""
+        params = {"symbol": symbol.upper(), "limit": limit}
+        if order_id is not None:
+            params["orderId"] = order_id
+        if from_id is not None:
+            params["fromId"] = from_id
+        params["timestamp"] = int(time.time() * 1000)
+        params["recvWindow"] = 5000
+
+        query_string = urllib.parse.urlencode(params)
+        signature = self._sign(query_string)
+        url = f"{BASE_URL}/fapi/v1/userTrades?{query_string}&signature={signature}"
+
+        return self._handle_request("GET", url, headers=self.headers)
+
+    def get_leverage_brackets(self, symbol: str = None) -> List[Dict]:
+        """Fetches notional/leverage brackets for one symbol, or all symbols."""
+        params = {"symbol": symbol.upper()} if symbol else {}
+        params["timestamp"] = int(time.time() * 1000)
+        params["recvWindow"] = 5000
+
+        query_string = urllib.parse.urlencode(params)
+        signature = self._sign(query_string)
+        url = f"{BASE_URL}/fapi/v1/leverageBracket?{query_string}&signature={signature}"
+
+        data = self._handle_request("GET", url, headers=self.headers)
+        # A single-symbol query returns one object instead of a list
+        return data if isinstance(data, list) else [data]
+
     def get_account_info(self):
         ts = int(time.time() * 1000)
         query = f"timestamp={ts}&recvWindow=5000"
@@ -0,0 +1,114 @@
+import time, threading, logging
+from typing import Dict, Optional, Tuple
+from rich.live import Live
+from rich.table import Table
+
+from bot.streams import MarketState, MarketStream, SymbolState
+
+logger = logging.getLogger("tradebot")
+
+COLUMNS = ["Symbol", "Mark", "Bid", "Ask", "Spread", "Position", "Entry", "uPnL"]
+
+
+def format_row(st: SymbolState) -> Tuple[str, ...]:
+    pnl = st.pnl
+    pnl_style = "green" if pnl > 0 else "red" if pnl < 0 else "white"
+    return (
+        st.symbol,
+        f"{st.mark:.6g}",
+        f"{st.bid:.6g}",
+        f"{st.ask:.6g}",
+        f"{st.spread:.6g}",
+        f"{st.position:g}" if st.position else "-",
+        f"{st.entry:.6g}" if st.position else "-",
+        f"[{pnl_style}]{pnl:.2f}[/{pnl_style}]" if st.position else "-",
+    )
+
+
+class PositionPoller(threading.Thread):
+    """Refreshes positions from the account endpoint off the render thread."""
+
+    def __init__(self, state: MarketState, client, interval: float = 10.0):
+        super().__init__(name="position-poller", daemon=True)
+        self.state = state
+        self.client = client
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        failing = False
+        while not self._stop_event.is_set():
+            try:
+                self.state.set_positions(self.client.get_account_info().get("positions", []))
+                if failing:
+                    logger.warning("Position polling recovered")
+                failing = False
+            except Exception as e:
+                # Log once per outage rather than every interval
+                if not failing:
+                    logger.warning("Position polling failed, PnL will be stale: %s", e)
+                failing = True
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class Dashboard:
+    """Live multi-symbol table rendered from a MarketState.
+
+    Frames are capped at `fps` and skipped entirely when nothing changed;
+    only rows for symbols updated since the previous frame are reformatted.
+    """
+
+    def __init__(self, state: MarketState, fps: float = 4.0, limit: Optional[int] = None):
+        if fps <= 0:
+            raise ValueError("fps must be positive")
+        self.state = state
+        self.interval = 1.0 / fps
+        self.limit = limit
+        self._rows: Dict[str, Tuple[str, ...]] = {}
+
+    def update_rows(self) -> bool:
+        dirty = self.state.drain_dirty()
+        for symbol in dirty:
+            self._rows[symbol] = format_row(self.state.get(symbol))
+        return bool(dirty)
+
+    def render(self) -> Table:
+        table = Table(title="Live Market", expand=False)
+        for col in COLUMNS:
+            table.add_column(col, style="cyan" if col == "Symbol" else "white", justify="left" if col == "Symbol" else "right")
+
+        # Open positions first, then alphabetical
+        order = sorted(self._rows, key=lambda s: (not self.state.get(s).position, s))
+        for symbol in order[:self.limit]:
+            table.add_row(*self._rows[symbol])
+        return table
+
+    def run(self, client=None, position_interval: float = 10.0):
+        """Streams market data and redraws until interrupted.
+
+        Positions are polled from the account endpoint every
+        `position_interval` seconds on a background thread; unrealized PnL is
+        recomputed locally from the streamed mark price in between.
+        """
+        stream = MarketStream(self.state)
+        stream.start()
+        poller = PositionPoller(self.state, client, position_interval) if client is not None else None
+        if poller is not None:
+            poller.start()
+        try:
+            with Live(self.render(), auto_refresh=False, vertical_overflow="crop") as live:
+                while True:
+                    now = time.monotonic()
+                    if self.update_rows():
+                        live.update(self.render(), refresh=True)
+
+                    time.sleep(max(0.0, self.interval - (time.monotonic() - now)))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stream.stop()
+            if poller is not None:
+                poller.stop()
@@ -0,0 +1,346 @@
+import sqlite3, threading, queue, time, logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from bot.logging_config import LOG_DIR
+
+LEDGER_DB = LOG_DIR / "ledger.db"
+
+logger = logging.getLogger("tradebot")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT,
+    order_type TEXT,
+    quantity REAL,
+    price REAL,
+    reduce_only INTEGER DEFAULT 0,
+    status TEXT NOT NULL,
+    order_id INTEGER,
+    client_order_id TEXT,
+    reason TEXT,
+    detail TEXT
+);
+CREATE TABLE IF NOT EXISTS fills (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT,
+    order_id INTEGER,
+    client_order_id TEXT,
+    trade_id INTEGER,
+    quantity REAL NOT NULL,
+    price REAL NOT NULL,
+    commission REAL DEFAULT 0,
+    realized_pnl REAL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS account_snapshots (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    available_balance REAL,
+    wallet_balance REAL,
+    unrealized_pnl REAL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_symbol_ts ON orders(symbol, ts);
+CREATE INDEX IF NOT EXISTS idx_orders_ts ON orders(ts);
+CREATE INDEX IF NOT EXISTS idx_orders_client_id ON orders(client_order_id);
+CREATE INDEX IF NOT EXISTS idx_fills_symbol_ts ON fills(symbol, ts);
+CREATE INDEX IF NOT EXISTS idx_fills_client_id ON fills(client_order_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fills_trade_id ON fills(symbol, trade_id);
+CREATE INDEX IF NOT EXISTS idx_snapshots_ts ON account_snapshots(ts);
+"""
+
+INSERTS = {
+    "order": (
+        "INSERT INTO orders (ts, symbol, side, order_type, quantity, price, reduce_only, "
+        "status, order_id, client_order_id, reason, detail) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)"
+    ),
+    # Trade ids are unique per symbol, so re-synced fills are skipped
+    "fill": (
+        "INSERT OR IGNORE INTO fills (ts, symbol, side, order_id, client_order_id, trade_id, "
+        "quantity, price, commission, realized_pnl) VALUES (?,?,?,?,?,?,?,?,?,?)"
+    ),
+    "snapshot": (
+        "INSERT INTO account_snapshots (ts, available_balance, wallet_balance, unrealized_pnl) "
+        "VALUES (?,?,?,?)"
+    ),
+}
+
+_STOP = object()
+
+# Max trades per /fapi/v1/userTrades page
+TRADE_PAGE = 1000
+
+# Attempts for a batch that hits a transient error (locked/busy database)
+MAX_WRITE_ATTEMPTS = 5
+
+
+def _connect(path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=10.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class TradeLedger:
+    """SQLite ledger of orders, fills and account snapshots.
+
+    Writes are queued and committed in batches by a background thread so the
+    order path never waits on disk. Reads go through a separate connection,
+    which WAL mode allows to run alongside the writer.
+    """
+
+    def __init__(self, path: Path = LEDGER_DB, batch_size: int = 200, flush_interval: float = 0.5):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._reader: Optional[sqlite3.Connection] = None
+        self.dropped = 0
+        self._dropped_at_flush = 0
+
+        conn = _connect(self.path)
+        with conn:
+            # Ledgers created before trade ids were recorded lack the column
+            cols = {row[1] for row in conn.execute("PRAGMA table_info(fills)")}
+            if cols and "trade_id" not in cols:
+                conn.execute("ALTER TABLE fills ADD COLUMN trade_id INTEGER")
+            conn.executescript(SCHEMA)
+        conn.close()
+
+    # --- Writes (non-blocking) ---
+    def record_order(self, symbol, side, order_type, quantity, price=None, status="SUCCESS",
+                     order_id=None, client_order_id=None, reason=None, detail=None,
+                     reduce_only=False, ts=None):
+        self._enqueue("order", (
+            ts or time.time(), symbol, side, order_type, quantity, price, int(bool(reduce_only)),
+            status, order_id, client_order_id, reason, detail,
+        ))
+
+    def record_fill(self, symbol, side, quantity, price, order_id=None, client_order_id=None,
+                    commission=0.0, realized_pnl=0.0, ts=None, trade_id=None):
+        self._enqueue("fill", (
+            ts or time.time(), symbol, side, order_id, client_order_id, trade_id,
+            float(quantity), float(price), float(commission), float(realized_pnl),
+        ))
+
+    def record_trades(self, trades: List[Dict[str, Any]], client_order_id=None,
+                      client_ids: Dict[int, str] = None):
+        """Records fills from a /fapi/v1/userTrades response.
+
+        `client_ids` maps exchange order ids to client order ids when the
+        trades span several orders.
+        """
+        for t in trades:
+            self.record_fill(
+                symbol=t["symbol"],
+                side=t.get("side"),
+                quantity=t["qty"],
+                price=t["price"],
+                order_id=t.get("orderId"),
+                client_order_id=client_order_id or (client_ids or {}).get(t.get("orderId")),
+                trade_id=t.get("id"),
+                commission=t.get("commission", 0.0),
+                realized_pnl=t.get("realizedPnl", 0.0),
+                ts=t["time"] / 1000 if t.get("time") else None,
+            )
+
+    def record_snapshot(self, account_info: Dict[str, Any], ts=None):
+        """Records balances from a /fapi/v2/account response."""
+        self._enqueue("snapshot", (
+            ts or time.time(),
+            float(account_info.get("availableBalance", 0.0)),
+            float(account_info.get("totalWalletBalance", 0.0)),
+            float(account_info.get("totalUnrealizedProfit", 0.0)),
+        ))
+
+    def _enqueue(self, kind, row):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name="ledger-writer", daemon=True)
+                self._writer.start()
+        self._queue.put((kind, row))
+
+    def _run_writer(self):
+        conn = _connect(self.path)
+        retry: list = []
+        stop = False
+        while not stop or retry:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            except queue.Empty:
+                if not retry:
+                    continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            items = retry
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                    self._queue.task_done()
+                    continue
+                kind, row = item
+                items.append((kind, row, 0))
+
+            retry = self._commit(conn, items, final=stop)
+            # Rows still being retried stay unacknowledged so flush() waits
+            for _ in range(len(items) - len(retry)):
+                self._queue.task_done()
+        conn.close()
+
+    def _commit(self, conn, items, final=False) -> list:
+        """Writes items grouped by kind; returns the ones to retry later."""
+        groups: Dict[str, list] = {}
+        for item in items:
+            groups.setdefault(item[0], []).append(item)
+
+        retry = []
+        for kind, group in groups.items():
+            try:
+                with conn:
+                    conn.executemany(INSERTS[kind], [row for _, row, _ in group])
+                continue
+            except sqlite3.OperationalError as e:
+                # Locked/busy or I/O errors are usually transient: keep the rows
+                attempts = max(item[2] for item in group) + 1
+                if not final and attempts < MAX_WRITE_ATTEMPTS:
+                    logger.warning("Ledger write of %d %s rows failed (attempt %d), retrying: %s",
+                                   len(group), kind, attempts, e)
+                    retry += [(k, row, attempts) for k, row, _ in group]
+                    continue
+            except sqlite3.Error:
+                pass
+
+            # Write row by row so one bad row doesn't take the batch with it
+            for _, row, _ in group:
+                try:
+                    with conn:
+                        conn.execute(INSERTS[kind], row)
+                except sqlite3.Error as e:
+                    self.dropped += 1
+                    logger.warning("Ledger dropped %s row %r: %s", kind, row, e)
+        return retry
+
+    def flush(self) -> bool:
+        """Blocks until every queued write has been committed or dropped.
+
+        Returns False if any rows were dropped since the previous flush.
+        """
+        if self._writer is not None:
+            self._queue.join()
+        dropped, self._dropped_at_flush = self.dropped - self._dropped_at_flush, self.dropped
+        return dropped == 0
+
+    def sync_fills(self, client, symbols: List[str] = None) -> int:
+        """Pulls trades newer than the last recorded fill for each symbol.
+
+        Defaults to every symbol the ledger has orders for. Trades already
+        recorded are skipped by the (symbol, trade_id) index. Returns the
+        number of trades fetched.
+
+        The cursor is the highest recorded trade id, so fills for a symbol
+        should come in through here: inserting a newer trade directly with
+        record_trades would move the cursor past fills not yet recorded.
+        """
+        self.flush()
+        if symbols is None:
+            symbols = [r["symbol"] for r in self._query("SELECT DISTINCT symbol FROM orders")]
+
+        fetched = 0
+        for symbol in symbols:
+            symbol = symbol.upper()
+            last = self._query("SELECT MAX(trade_id) AS last FROM fills WHERE symbol = ?", (symbol,))[0]["last"]
+            client_ids = {
+                r["order_id"]: r["client_order_id"]
+                for r in self._query(
+                    "SELECT order_id, client_order_id FROM orders "
+                    "WHERE symbol = ? AND order_id IS NOT NULL", (symbol,)
+                )
+            }
+            from_id = last + 1 if last is not None else None
+            while True:
+                trades = client.get_user_trades(symbol, from_id=from_id, limit=TRADE_PAGE)
+                self.record_trades(trades, client_ids=client_ids)
+                fetched += len(trades)
+                # Without a starting id Binance returns only the latest page
+                if len(trades) < TRADE_PAGE or from_id is None:
+                    break
+                from_id = max(t["id"] for t in trades) + 1
+        self.flush()
+        return fetched
+
+    def close(self):
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(_STOP)
+            writer.join()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    # --- Queries ---
+    def _query(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        if self._reader is None:
+            self._reader = _connect(self.path)
+            self._reader.row_factory = sqlite3.Row
+        return [dict(r) for r in self._reader.execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _where(symbol=None, since=None, prefix=""):
+        clauses, params = [], []
+        if symbol:
+            clauses.append(f"{prefix}symbol = ?")
+            params.append(symbol.upper())
+        if since:
+            clauses.append(f"{prefix}ts >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def pnl_by_symbol(self, symbol=None, since=None) -> List[Dict[str, Any]]:
+        """Realized PnL, fees and traded volume per symbol."""
+        where, params = self._where(symbol, since)
+        return self._query(
+            "SELECT symbol, COUNT(*) AS fills, SUM(quantity * price) AS volume, "
+            "SUM(realized_pnl) AS realized_pnl, SUM(commission) AS commission, "
+            "SUM(realized_pnl) - SUM(commission) AS net_pnl "
+            f"FROM fills{where} GROUP BY symbol ORDER BY net_pnl DESC",
+            params,
+        )
+
+    def fill_rate(self, symbol=None, since=None) -> List[Dict[str, Any]]:
+        """Share of accepted orders that received at least one fill, per symbol."""
+        where, params = self._where(symbol, since, prefix="o.")
+        return self._query(
+            "SELECT o.symbol AS symbol, COUNT(*) AS orders, "
+            "SUM(o.status = 'SUCCESS') AS accepted, "
+            "SUM(EXISTS (SELECT 1 FROM fills f WHERE f.client_order_id = o.client_order_id)) AS filled "
+            f"FROM orders o{where} GROUP BY o.symbol ORDER BY o.symbol",
+            params,
+        )
+
+    def rejection_reasons(self, symbol=None, since=None) -> List[Dict[str, Any]]:
+        """Failed orders grouped by interpret_binance_error category."""
+        where, params = self._where(symbol, since)
+        where = (where + " AND" if where else " WHERE") + " status = 'FAIL'"
+        return self._query(
+            "SELECT reason, COUNT(*) AS count, MAX(detail) AS detail "
+            f"FROM orders{where} GROUP BY reason ORDER BY count DESC",
+            params,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
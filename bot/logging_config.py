@@ -9,7 +9,7 @@ DEBUG_LOG = LOG_DIR / "debug.log"
 
 
 # --- Order Journal (1 line per order) ---
-def log_order(symbol, side, order_type, quantity, price=None, status="SUCCESS", reason=None, balance=None):
+def log_order(symbol, side, order_type, quantity, price=None, status="SUCCESS", reason=None, balance=None, order_id=None, client_order_id=None):
 
     timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -20,6 +20,12 @@ def log_order(symbol, side, order_type, quantity, price=None, status="SUCCESS",
 
     line += f" | {status}"
 
+    if order_id is not None:
+        line += f" | id={order_id}"
+
+    if client_order_id:
+        line += f" | cid={client_order_id}"
+
     if balance is not None:
         line += f" | bal={balance}"
 
@@ -1,7 +1,29 @@
+import uuid
 from bot.client import BinanceClient
 
 client = BinanceClient()
 
+def new_client_order_id():
+    return f"tb-{uuid.uuid4().hex[:24]}"
+
+
+def build_order_payload(order, reduce_only=False, client_order_id=None):
+    """Builds place_order params from a validated OrderInput."""
+    payload = {
+        "symbol": order.symbol.upper(),
+        "side": order.side,
+        "type": order.order_type,
+        "quantity": order.quantity,
+        "reduceOnly": reduce_only,
+        "newClientOrderId": client_order_id or new_client_order_id()
+    }
+
+    if order.order_type == "LIMIT":
+        payload["price"] = order.price
+        payload["timeInForce"] = "GTC" # Mandatory for Limit orders
+    return payload
+
+
 def place_market(symbol, side, quantity, reduceOnly):
     params = {
         "symbol": symbol,
@@ -0,0 +1,200 @@
+from bisect import bisect_right
+from typing import List, Dict, Any, Optional
+
+# Fallback when the account has no leverage set for the symbol
+DEFAULT_LEVERAGE = 20
+# Taker fee charged on opening (Binance USDⓈ-M regular tier)
+TAKER_FEE = 0.0005
+MAX_LEVERAGE = 125
+
+
+class SymbolBrackets:
+    """Precomputed leverage/maintenance-margin tables for one symbol.
+
+    Built once from a /fapi/v1/leverageBracket entry so every lookup is an
+    index or a bisect over a handful of brackets.
+    """
+
+    def __init__(self, symbol: str, brackets: List[Dict[str, Any]]):
+        self.symbol = symbol
+        brackets = sorted(brackets, key=lambda b: float(b["notionalFloor"]))
+        self.floors = [float(b["notionalFloor"]) for b in brackets]
+        self.caps = [float(b["notionalCap"]) for b in brackets]
+        self.mmr = [float(b["maintMarginRatio"]) for b in brackets]
+        self.cum = [float(b.get("cum", 0.0)) for b in brackets]
+
+        # max_notional[lev] = largest notional allowed at that leverage
+        self.max_notional = [0.0] * (MAX_LEVERAGE + 1)
+        for b in brackets:
+            lev, cap = int(b["initialLeverage"]), float(b["notionalCap"])
+            for l in range(1, min(lev, MAX_LEVERAGE) + 1):
+                self.max_notional[l] = max(self.max_notional[l], cap)
+
+    def bracket_index(self, notional: float) -> int:
+        return max(0, min(bisect_right(self.floors, notional) - 1, len(self.floors) - 1))
+
+    def maint_margin(self, notional: float) -> float:
+        i = self.bracket_index(notional)
+        return notional * self.mmr[i] - self.cum[i]
+
+    def notional_cap(self, leverage: int) -> float:
+        return self.max_notional[max(1, min(int(leverage), MAX_LEVERAGE))]
+
+
+class PositionSizer:
+    """Margin, max quantity and liquidation estimates from cached brackets.
+
+    Leverage brackets are fetched once for all symbols; balance, per-symbol
+    leverage and open positions come from an account snapshot passed to
+    `update_account`, so sizing an order makes no extra API calls. Bracket
+    caps and liquidation estimates apply to the position after the order,
+    as on the exchange.
+    """
+
+    def __init__(self, client=None, fee_rate: float = TAKER_FEE):
+        self.client = client
+        self.fee_rate = fee_rate
+        self.brackets: Dict[str, SymbolBrackets] = {}
+        self.balance = 0.0
+        self.wallet_balance = 0.0
+        self.leverage: Dict[str, int] = {}
+        self.isolated: Dict[str, bool] = {}
+        self.positions: Dict[str, float] = {}
+        self.entry_prices: Dict[str, float] = {}
+        self._fetched = False
+
+    def load_brackets(self, data: List[Dict[str, Any]]):
+        for entry in data:
+            self.brackets[entry["symbol"]] = SymbolBrackets(entry["symbol"], entry["brackets"])
+
+    def update_account(self, account_info: Dict[str, Any]):
+        """Caches balance and leverage settings from a /fapi/v2/account response."""
+        self.balance = float(account_info.get("availableBalance", 0.0))
+        self.wallet_balance = float(account_info.get("totalWalletBalance", self.balance))
+        for p in account_info.get("positions", []):
+            self.leverage[p["symbol"]] = int(p.get("leverage", DEFAULT_LEVERAGE))
+            self.isolated[p["symbol"]] = bool(p.get("isolated", False))
+            self.positions[p["symbol"]] = float(p.get("positionAmt", 0.0))
+            self.entry_prices[p["symbol"]] = float(p.get("entryPrice", 0.0))
+
+    def get_brackets(self, symbol: str) -> Optional[SymbolBrackets]:
+        # One call covers every symbol, so fetch at most once per session
+        if not self._fetched and self.client is not None:
+            self.load_brackets(self.client.get_leverage_brackets())
+            self._fetched = True
+        return self.brackets.get(symbol.upper())
+
+    def get_leverage(self, symbol: str) -> int:
+        return self.leverage.get(symbol.upper(), DEFAULT_LEVERAGE)
+
+    def initial_margin(self, notional: float, leverage: int) -> float:
+        """Margin plus opening fee needed to open `notional`."""
+        return notional / leverage + notional * self.fee_rate
+
+    def max_quantity(self, symbol: str, price: float, balance: float = None, leverage: int = None,
+                     side: str = None, position_amt: float = None) -> float:
+        """Largest order quantity the balance and bracket cap allow.
+
+        Without a `side` the order is assumed to add to the open position.
+        An opposite-side order may first close the position, then open up to
+        the cap in the other direction.
+        """
+        symbol = symbol.upper()
+        if price <= 0:
+            return 0.0
+        leverage = leverage or self.get_leverage(symbol)
+        balance = self.balance if balance is None else balance
+        existing = self.positions.get(symbol, 0.0) if position_amt is None else position_amt
+        held = abs(existing) * price
+
+        brackets = self.get_brackets(symbol)
+        cap = brackets.notional_cap(leverage) if brackets is not None else float("inf")
+        by_balance = balance / (1.0 / leverage + self.fee_rate)
+
+        adding = side is None or not existing or (existing > 0) == (side.upper() == "BUY")
+        if adding:
+            max_notional = min(by_balance, max(0.0, cap - held))
+        else:
+            max_notional = held + min(by_balance, cap)
+        return max_notional / price
+
+    def liquidation_price(self, symbol: str, position_amt: float, entry_price: float, margin: float) -> Optional[float]:
+        """Liquidation price for a single position backed by `margin`."""
+        brackets = self.get_brackets(symbol)
+        if brackets is None or not position_amt:
+            return None
+
+        side = 1 if position_amt > 0 else -1
+        size = abs(position_amt)
+        i = brackets.bracket_index(size * entry_price)
+        denom = size * brackets.mmr[i] - side * size
+        price = (margin + brackets.cum[i] - side * size * entry_price) / denom
+        return max(price, 0.0)
+
+    def evaluate(self, symbol: str, side: str, quantity: float, price: float,
+                 balance: float = None, leverage: int = None, position_amt: float = None) -> Dict[str, Any]:
+        """Sizes one order on top of the open position.
+
+        Margin is required only for the part of the order that increases the
+        position; the fee applies to the whole order. `position_amt` overrides
+        the cached position (signed, as in positionAmt).
+        """
+        symbol = symbol.upper()
+        leverage = leverage or self.get_leverage(symbol)
+        # Cross positions are liquidated against the wallet, not what's free
+        wallet = self.wallet_balance if balance is None else balance
+        balance = self.balance if balance is None else balance
+        existing = self.positions.get(symbol, 0.0) if position_amt is None else position_amt
+        signed_qty = quantity if side.upper() == "BUY" else -quantity
+        combined = existing + signed_qty
+
+        notional = quantity * price
+        position_notional = abs(combined) * price
+        increase = max(0.0, abs(combined) - abs(existing)) * price
+        required = increase / leverage + notional * self.fee_rate
+
+        brackets = self.get_brackets(symbol)
+        cap = brackets.notional_cap(leverage) if brackets is not None else None
+
+        # Entry of the combined position: averaged when adding, unchanged
+        # when reducing, the order price once the position flips
+        entry = self.entry_prices.get(symbol, 0.0) or price
+        if not existing or existing * combined < 0:
+            entry = price
+        elif abs(combined) > abs(existing):
+            entry = (abs(existing) * entry + quantity * price) / abs(combined)
+
+        margin = abs(combined) * entry / leverage if self.isolated.get(symbol) else wallet
+        return {
+            "symbol": symbol,
+            "notional": notional,
+            "position_amt": combined,
+            "position_notional": position_notional,
+            "leverage": leverage,
+            "required_margin": required,
+            "balance": balance,
+            "max_quantity": self.max_quantity(symbol, price, balance, leverage, side, existing),
+            "notional_cap": cap,
+            "liquidation_price": self.liquidation_price(symbol, combined, entry, margin),
+            "ok": required <= balance and (cap is None or position_notional <= cap or increase == 0),
+        }
+
+    def evaluate_portfolio(self, orders: List[Dict[str, Any]], balance: float = None) -> List[Dict[str, Any]]:
+        """Sizes many orders, each drawing on what the previous ones left over.
+
+        Accepted orders also update the simulated position, so later orders on
+        the same symbol are checked against the combined size.
+        """
+        remaining = self.balance if balance is None else balance
+        positions: Dict[str, float] = {}
+        results = []
+        for o in orders:
+            symbol = o["symbol"].upper()
+            res = self.evaluate(symbol, o["side"], o["quantity"], o["price"], balance=remaining,
+                                leverage=o.get("leverage"),
+                                position_amt=positions.get(symbol, self.positions.get(symbol, 0.0)))
+            if res["ok"]:
+                remaining -= res["required_margin"]
+                positions[symbol] = res["position_amt"]
+            results.append(res)
+        return results
@@ -0,0 +1,483 @@
+import time, threading, logging, importlib, multiprocessing, atexit
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from bot.validators import OrderInput
+from bot.orders import new_client_order_id, build_order_payload
+from bot.logging_config import log_order, interpret_binance_error
+from bot.sizing import PositionSizer
+
+logger = logging.getLogger("tradebot")
+
+# Row layout of the shared market buffer
+FIELDS = ("ts", "mark", "bid", "ask")
+Row = Tuple[float, float, float, float]
+
+
+class OrderIntent(OrderInput):
+    """An order a strategy wants placed; validated like any manual order."""
+    reduce_only: bool = False
+
+
+class Strategy:
+    """Base class for strategy plugins.
+
+    `on_event` receives the symbol and its most recent `lookback` rows of
+    (ts, mark, bid, ask), oldest first, and returns a list of OrderIntent.
+    Strategies with `cpu_bound = True` run in worker processes; every event
+    for a given (strategy, symbol) pair goes to the same worker, so state kept
+    per symbol on `self` stays consistent. `name` defaults to the class name
+    and must be unique within a runner.
+    """
+
+    symbols: List[str] = []
+    lookback = 1
+    cpu_bound = False
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+    def on_event(self, symbol: str, window: List[Row]) -> List[OrderIntent]:
+        raise NotImplementedError
+
+
+def load_strategy(path: str) -> Strategy:
+    """Instantiates a strategy from a "package.module:ClassName" path."""
+    module_name, _, class_name = path.partition(":")
+    if not class_name:
+        raise ValueError(f"Strategy path must look like module:Class, got {path!r}")
+    cls = getattr(importlib.import_module(module_name), class_name)
+    return cls()
+
+
+class StaleWindowError(RuntimeError):
+    """The writer overwrote a window faster than a reader could copy it."""
+
+
+class MarketBuffer:
+    """Per-symbol ring buffers of market rows in shared memory.
+
+    The parent process writes rows, then publishes each symbol's head in a
+    shared header; workers attach by name and read a window ending at the head
+    they were handed, so events travel to the pool as a few integers instead
+    of pickled history. Readers re-check the published head after copying and
+    retry from the latest head if the writer lapped them.
+    """
+
+    def __init__(self, symbols: Iterable[str], capacity: int = 1024, name: str = None):
+        self.symbols = [s.upper() for s in symbols]
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.capacity = capacity
+        self.stride = capacity * len(FIELDS)
+        n = max(1, len(self.symbols))
+        header = n * 8
+        size = header + n * self.stride * 8
+
+        self.owner = name is None
+        self.shm = SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.heads = self.shm.buf[:header].cast("q")
+        self.data = self.shm.buf[header:size].cast("d")
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, i: int, ts: float, mark: float, bid: float, ask: float) -> int:
+        """Appends a row for symbol index `i` and returns the new head."""
+        head = self.heads[i]
+        off = i * self.stride + (head % self.capacity) * len(FIELDS)
+        self.data[off] = ts
+        self.data[off + 1] = mark
+        self.data[off + 2] = bid
+        self.data[off + 3] = ask
+        # Publish only after the row is complete
+        self.heads[i] = head + 1
+        return head + 1
+
+    def window(self, i: int, head: int, lookback: int, retries: int = 3) -> List[Row]:
+        """Returns up to `lookback` rows written before `head`, oldest first.
+
+        If the writer has wrapped onto the oldest copied row by the time the
+        copy finishes, the copy is discarded and retried from the latest head.
+        """
+        # The oldest slot of a full-capacity window is the writer's next slot
+        if lookback >= self.capacity:
+            raise ValueError(f"lookback {lookback} must be below buffer capacity {self.capacity}")
+        n = len(FIELDS)
+        base = i * self.stride
+        for _ in range(retries):
+            start = max(0, head - lookback)
+            rows = []
+            for pos in range(start, head):
+                off = base + (pos % self.capacity) * n
+                rows.append(tuple(self.data[off:off + n]))
+            current = self.heads[i]
+            # Slot `start` is reused by the row at position start + capacity,
+            # which the writer may be filling once the head reaches it
+            if start + self.capacity > current:
+                return rows
+            head = current
+        raise StaleWindowError(f"{self.symbols[i]}: window overwritten {retries} times in a row")
+
+    def last(self, i: int) -> Optional[Row]:
+        head = self.heads[i]
+        return self.window(i, head, 1)[0] if head else None
+
+    def close(self):
+        self.data.release()
+        self.heads.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class LatencyStats:
+    """Rolling latency samples and counters for one strategy."""
+
+    def __init__(self, window: int = 1000):
+        self.compute = deque(maxlen=window)
+        self.submit = deque(maxlen=window)
+        self.events = 0
+        self.conflated = 0
+        self.intents = 0
+        self.orders = 0
+        self.rejected = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def count(self, field: str, n: int = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    def record(self, samples: str, t0: int):
+        """Records the time elapsed since perf_counter_ns() value `t0`."""
+        with self._lock:
+            getattr(self, samples).append(time.perf_counter_ns() - t0)
+
+    @staticmethod
+    def _pct(samples, q):
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1e6
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters plus p50/p99 latencies in milliseconds."""
+        with self._lock:
+            compute, submit = list(self.compute), list(self.submit)
+            return {
+                "events": self.events,
+                "conflated": self.conflated,
+                "intents": self.intents,
+                "orders": self.orders,
+                "rejected": self.rejected,
+                "errors": self.errors,
+                "compute_p50_ms": self._pct(compute, 0.5),
+                "compute_p99_ms": self._pct(compute, 0.99),
+                "submit_p50_ms": self._pct(submit, 0.5),
+                "submit_p99_ms": self._pct(submit, 0.99),
+            }
+
+
+# --- Worker process side ---
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(buffer_name, symbols, capacity, strategies):
+    _worker["buffer"] = MarketBuffer(symbols, capacity, name=buffer_name)
+    # Release the views before SharedMemory.__del__ runs at interpreter exit
+    atexit.register(_worker["buffer"].close)
+    _worker["strategies"] = strategies
+
+
+def _run_strategy(s_idx, sym_idx, head):
+    buf = _worker["buffer"]
+    strategy = _worker["strategies"][s_idx]
+    return strategy.on_event(buf.symbols[sym_idx], buf.window(sym_idx, head, strategy.lookback))
+
+
+class StrategyRunner:
+    """Feeds market events to strategies and routes their intents to orders.
+
+    `on_market_event` is meant to be a MarketState listener: it appends the
+    update to the shared buffer, runs light strategies inline and hands
+    CPU-bound ones to the process pool without waiting. While a (strategy,
+    symbol) task is in flight newer events are conflated into one follow-up
+    task. Intents are validated with OrderInput against cached exchange
+    filters and placed from a single order thread so the stream thread never
+    blocks on HTTP.
+    """
+
+    def __init__(self, strategies: List[Strategy], symbols: Iterable[str], client=None,
+                 workers: int = None, capacity: int = 1024, dry_run: bool = False,
+                 ledger=None, mp_context=None, account_ttl: float = 5.0):
+        self.strategies = list(strategies)
+        names = [s.name for s in self.strategies]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError(f"Strategy names must be unique, got duplicates: {', '.join(duplicates)}")
+        for s in self.strategies:
+            # Leave headroom so a worker can copy its window before the writer laps it
+            if not 1 <= s.lookback <= capacity // 2:
+                raise ValueError(f"{s.name}: lookback must be between 1 and {capacity // 2} (capacity {capacity})")
+
+        self.client = client
+        self.dry_run = dry_run
+        self.ledger = ledger
+        self.sizer = PositionSizer(client) if client is not None else None
+        self.account_ttl = account_ttl
+        self._account_at = None
+        self.buffer = MarketBuffer(symbols, capacity)
+        self.stats = {name: LatencyStats() for name in names}
+        self._closed = False
+        self._event_lock = threading.Lock()
+        self._symbol_sets = [{x.upper() for x in s.symbols} for s in self.strategies]
+        self._filters: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = set()
+        self._pending: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+        self._pools: List[ProcessPoolExecutor] = []
+        if any(s.cpu_bound for s in self.strategies):
+            # Spawn, not fork: the parent already runs stream/ledger threads
+            ctx = mp_context or multiprocessing.get_context("spawn")
+            cpu_strategies = [s if s.cpu_bound else None for s in self.strategies]
+            # Tasks are routed per (strategy, symbol), so extra pools would sit idle
+            n_keys = sum(s.cpu_bound for s in self.strategies) * len(self.buffer.symbols)
+            for _ in range(min(workers or multiprocessing.cpu_count(), n_keys)):
+                self._pools.append(ProcessPoolExecutor(
+                    max_workers=1, mp_context=ctx, initializer=_init_worker,
+                    initargs=(self.buffer.name, self.buffer.symbols, capacity, cpu_strategies),
+                ))
+                # Start the worker now rather than on the first market event
+                self._pools[-1].submit(int)
+        self._orders = ThreadPoolExecutor(max_workers=1, thread_name_prefix="strategy-orders")
+
+    # --- Market events ---
+    def on_market_event(self, st):
+        """Handles one SymbolState update (MarketState listener)."""
+        t0 = time.perf_counter_ns()
+        # Held for the whole event so close() can't release the buffer mid-write
+        with self._event_lock:
+            if not self._closed:
+                self._on_market_event(st, t0)
+
+    def _on_market_event(self, st, t0):
+        i = self.buffer.index.get(st.symbol)
+        if i is None or not st.mark:
+            return
+        head = self.buffer.write(i, time.time(), st.mark, st.bid, st.ask)
+
+        for s_idx, strategy in enumerate(self.strategies):
+            if self._symbol_sets[s_idx] and st.symbol not in self._symbol_sets[s_idx]:
+                continue
+            stats = self.stats[strategy.name]
+            stats.count("events")
+
+            if strategy.cpu_bound:
+                self._dispatch(s_idx, i, head, t0)
+                continue
+            try:
+                intents = strategy.on_event(st.symbol, self.buffer.window(i, head, strategy.lookback))
+            except Exception as e:
+                stats.count("errors")
+                logger.debug("Strategy %s failed: %s", strategy.name, e)
+                continue
+            self._handle_intents(s_idx, intents, t0)
+
+    def _dispatch(self, s_idx, sym_idx, head, t0):
+        key = (s_idx, sym_idx)
+        with self._lock:
+            if key in self._in_flight:
+                if key in self._pending:
+                    self.stats[self.strategies[s_idx].name].count("conflated")
+                self._pending[key] = (head, t0)
+                return
+            self._in_flight.add(key)
+        self._submit_task(key, head, t0)
+
+    def _submit_task(self, key, head, t0):
+        s_idx, sym_idx = key
+        pool = self._pools[(s_idx * len(self.buffer.symbols) + sym_idx) % len(self._pools)]
+        try:
+            future = pool.submit(_run_strategy, s_idx, sym_idx, head)
+        except Exception as e:
+            # Broken or shut-down pool: release the slot so drain() can finish
+            self.stats[self.strategies[s_idx].name].count("errors")
+            logger.debug("Could not dispatch %s: %s", self.strategies[s_idx].name, e)
+            with self._lock:
+                self._pending.pop(key, None)
+                self._in_flight.discard(key)
+                if not self._in_flight:
+                    self._idle.notify_all()
+            return
+        future.add_done_callback(lambda f: self._on_task_done(key, f, t0))
+
+    def _on_task_done(self, key, future, t0):
+        with self._lock:
+            nxt = self._pending.pop(key, None)
+            if self._closed:
+                nxt = None
+            if nxt is None:
+                self._in_flight.discard(key)
+                if not self._in_flight:
+                    self._idle.notify_all()
+        if nxt is not None:
+            self._submit_task(key, *nxt)
+
+        try:
+            intents = future.result()
+        except Exception as e:
+            name = self.strategies[key[0]].name
+            self.stats[name].count("errors")
+            logger.debug("Strategy %s failed: %s", name, e)
+            return
+        self._handle_intents(key[0], intents, t0)
+
+    def _handle_intents(self, s_idx, intents, t0):
+        stats = self.stats[self.strategies[s_idx].name]
+        stats.record("compute", t0)
+        stats.count("intents", len(intents or []))
+        for intent in intents or []:
+            try:
+                self._orders.submit(self._submit_order, s_idx, intent, t0)
+            except RuntimeError as e:
+                # Order thread already shut down
+                stats.count("errors")
+                logger.debug("Dropped intent from %s: %s", self.strategies[s_idx].name, e)
+
+    # --- Order path ---
+    def _get_filters(self, symbol):
+        if symbol not in self._filters:
+            self._filters[symbol] = self.client.get_symbol_filters(symbol)
+        return self._filters[symbol]
+
+    def _refresh_account(self):
+        """Refreshes the sizer's account snapshot at most every `account_ttl` seconds."""
+        now = time.monotonic()
+        if self._account_at is None or now - self._account_at >= self.account_ttl:
+            self.sizer.update_account(self.client.get_account_info())
+            self._account_at = now
+
+    def _check_margin(self, symbol, intent: OrderIntent, price: float) -> Optional[Dict[str, Any]]:
+        try:
+            self._refresh_account()
+            return self.sizer.evaluate(symbol, intent.side, intent.quantity, price)
+        except Exception as e:
+            if not self.dry_run:
+                raise
+            # Dry runs may go without API keys; drop the margin check for the session
+            logger.warning("Margin check disabled for dry run: %s", e)
+            self.sizer = None
+            return None
+
+    def _submit_order(self, s_idx, intent: OrderIntent, t0):
+        name = self.strategies[s_idx].name
+        stats = self.stats[name]
+        symbol = intent.symbol.upper()
+        client_order_id = new_client_order_id()
+        filters = []
+        try:
+            filters = self._get_filters(symbol) if self.client is not None else []
+            intent.normalize_quantities(filters)
+
+            i = self.buffer.index.get(symbol)
+            last = self.buffer.last(i) if i is not None else None
+            errors = intent.validate_against_filters(filters, last[1] if last else None)
+            if errors:
+                stats.count("rejected")
+                self._record(intent, "FAIL", client_order_id, reason="INVALID", detail=f"{name}: {'; '.join(errors)}")
+                return
+
+            # Same margin/bracket check as the interactive order path
+            if self.sizer is not None and not intent.reduce_only:
+                price = intent.price or (last[1] if last else 0.0)
+                sizing = self._check_margin(symbol, intent, price)
+                if sizing is not None and not sizing["ok"]:
+                    stats.count("rejected")
+                    over_cap = sizing["required_margin"] <= sizing["balance"]
+                    self._record(intent, "FAIL", client_order_id,
+                                 reason="BRACKET" if over_cap else "BALANCE",
+                                 detail=f"{name}: need {sizing['required_margin']:.2f} USDT, have {sizing['balance']:.2f} USDT")
+                    return
+                if sizing is not None:
+                    # Reserve the margin and position until the next account refresh
+                    self.sizer.balance -= sizing["required_margin"]
+                    self.sizer.positions[symbol] = sizing["position_amt"]
+
+            payload = build_order_payload(intent, intent.reduce_only, client_order_id)
+            stats.record("submit", t0)
+            stats.count("orders")
+            if self.dry_run:
+                logger.info("[%s] dry run: %s", name, payload)
+                return
+
+            res = self.client.place_order(payload)
+            self._record(intent, "SUCCESS", res.get("clientOrderId", client_order_id),
+                         order_id=res.get("orderId"), detail=name)
+        except Exception as e:
+            reason, detail = "REJECT", str(e)
+            if e.args and isinstance(e.args[0], dict):
+                reason, detail = interpret_binance_error(e.args[0], filters)
+            stats.count("rejected")
+            self._record(intent, "FAIL", client_order_id, reason=reason, detail=f"{name}: {detail}")
+
+    def _record(self, intent, status, client_order_id, order_id=None, reason=None, detail=None):
+        if self.dry_run:
+            # Keep simulated rejections out of orders.log and the ledger
+            logger.info("dry run %s %s %s %s: %s", status, intent.side, intent.quantity, intent.symbol, reason)
+            return
+        log_order(
+            symbol=intent.symbol,
+            side=intent.side,
+            order_type=intent.order_type,
+            quantity=intent.quantity,
+            price=intent.price,
+            status=status,
+            reason=reason,
+            order_id=order_id,
+            client_order_id=client_order_id
+        )
+        if self.ledger is not None:
+            self.ledger.record_order(
+                symbol=intent.symbol.upper(),
+                side=intent.side,
+                order_type=intent.order_type,
+                quantity=intent.quantity,
+                price=intent.price,
+                status=status,
+                order_id=order_id,
+                client_order_id=client_order_id,
+                reason=reason,
+                detail=detail,
+                reduce_only=intent.reduce_only
+            )
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+    def drain(self, timeout: float = None) -> bool:
+        """Waits until no strategy task is in flight or pending."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._in_flight, timeout)
+
+    def close(self):
+        # Stop taking events first; pending follow-ups are dropped from here on
+        with self._event_lock:
+            self._closed = True
+        self.drain(timeout=10.0)
+        # Pool shutdown waits for done-callbacks, which may still queue orders
+        for pool in self._pools:
+            pool.shutdown(wait=True, cancel_futures=True)
+        self._orders.shutdown(wait=True)
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,155 @@
+import os, json, threading, logging
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+# Mainnet: wss://fstream.binance.com | Testnet: wss://stream.binancefuture.com
+STREAM_URL = os.getenv("STREAM_URL", "wss://fstream.binance.com")
+
+# Binance caps a combined stream connection at 200 streams (2 per symbol)
+MAX_SYMBOL_STREAMS = 100
+
+logger = logging.getLogger("tradebot")
+
+
+class SymbolState:
+    __slots__ = ("symbol", "mark", "bid", "ask", "position", "entry")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.mark = 0.0
+        self.bid = 0.0
+        self.ask = 0.0
+        self.position = 0.0
+        self.entry = 0.0
+
+    @property
+    def spread(self) -> float:
+        return self.ask - self.bid if self.bid and self.ask else 0.0
+
+    @property
+    def pnl(self) -> float:
+        """Unrealized PnL at the current mark price."""
+        if not self.position or not self.mark:
+            return 0.0
+        return (self.mark - self.entry) * self.position
+
+
+class MarketState:
+    """In-memory per-symbol market view fed by stream messages.
+
+    Every update marks its symbol dirty so renderers only redo the rows that
+    changed since they last looked. Listeners are called with each updated
+    SymbolState on the stream thread and must not block.
+    """
+
+    def __init__(self, symbols: Optional[Iterable[str]] = None, listeners: Optional[List[Callable]] = None):
+        self.watch: Optional[Set[str]] = {s.upper() for s in symbols} if symbols else None
+        self.symbols: Dict[str, SymbolState] = {}
+        self.listeners: List[Callable] = list(listeners or [])
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str) -> Optional[SymbolState]:
+        return self.symbols.get(symbol)
+
+    def _state(self, symbol: str) -> Optional[SymbolState]:
+        if self.watch is not None and symbol not in self.watch:
+            return None
+        st = self.symbols.get(symbol)
+        if st is None:
+            st = self.symbols[symbol] = SymbolState(symbol)
+        return st
+
+    def apply(self, message: Dict):
+        """Applies one (combined-stream or raw) websocket message."""
+        data = message.get("data", message) if isinstance(message, dict) else message
+        events = data if isinstance(data, list) else [data]
+        updated = []
+
+        with self._lock:
+            for ev in events:
+                kind = ev.get("e")
+                st = self._state(ev.get("s", ""))
+                if st is None:
+                    continue
+
+                if kind == "markPriceUpdate":
+                    st.mark = float(ev["p"])
+                elif kind == "bookTicker" or ("b" in ev and "a" in ev):
+                    st.bid = float(ev["b"])
+                    st.ask = float(ev["a"])
+                else:
+                    continue
+                self._dirty.add(st.symbol)
+                updated.append(st)
+
+        for listener in self.listeners:
+            for st in updated:
+                listener(st)
+
+    def set_positions(self, positions: List[Dict]):
+        """Applies the positions list of a /fapi/v2/account response."""
+        with self._lock:
+            for p in positions:
+                amt = float(p.get("positionAmt", 0.0))
+                st = self.symbols.get(p["symbol"])
+                if st is None:
+                    if not amt:
+                        continue
+                    st = self._state(p["symbol"])
+                    if st is None:
+                        continue
+                entry = float(p.get("entryPrice", 0.0))
+                if st.position != amt or st.entry != entry:
+                    st.position = amt
+                    st.entry = entry
+                    self._dirty.add(st.symbol)
+
+    def drain_dirty(self) -> Set[str]:
+        """Returns and clears the set of symbols updated since the last call."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+
+def stream_names(symbols: Optional[Iterable[str]] = None) -> List[str]:
+    """Picks per-symbol streams for small watchlists, all-market streams otherwise."""
+    symbols = sorted({s.lower() for s in symbols}) if symbols else []
+    if not symbols or len(symbols) > MAX_SYMBOL_STREAMS:
+        return ["!markPrice@arr@1s", "!bookTicker"]
+    names = []
+    for s in symbols:
+        names += [f"{s}@markPrice@1s", f"{s}@bookTicker"]
+    return names
+
+
+class MarketStream(threading.Thread):
+    """Background thread that keeps a MarketState up to date from websockets."""
+
+    def __init__(self, state: MarketState, url: str = STREAM_URL, reconnect_delay: float = 1.0):
+        super().__init__(name="market-stream", daemon=True)
+        self.state = state
+        self.url = f"{url}/stream?streams=" + "/".join(stream_names(state.watch))
+        self.reconnect_delay = reconnect_delay
+        self._stop_event = threading.Event()
+
+    def run(self):
+        from websockets.sync.client import connect
+
+        delay = self.reconnect_delay
+        while not self._stop_event.is_set():
+            try:
+                with connect(self.url, open_timeout=10) as ws:
+                    delay = self.reconnect_delay
+                    while not self._stop_event.is_set():
+                        try:
+                            raw = ws.recv(timeout=1.0)
+                        except TimeoutError:
+                            continue
+                        self.state.apply(json.loads(raw))
+            except Exception as e:
+                logger.debug("Market stream disconnected: %s", e)
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, 30.0)
+
+    def stop(self):
+        self._stop_event.set()
@@ -1,12 +1,19 @@
 import typer
 import logging
+from typing import List
+from datetime import datetime
 from bot.validators import OrderInput
 from bot.client import BinanceClient
 from rich.console import Console
 from rich.table import Table
+from bot.ledger import TradeLedger
+from bot.orders import new_client_order_id, build_order_payload
+from bot.sizing import PositionSizer
 from bot.logging_config import (log_order, log_debug, interpret_binance_error)
 
 app = typer.Typer()
+ledger_app = typer.Typer(help="Query the local trade ledger.")
+app.add_typer(ledger_app, name="ledger")
 console = Console()
 
 def get_constraints_summary(filters):
@@ -44,11 +51,17 @@ def debug_print(console, message, debug):
     log_debug(message, debug)
 
 def interactive(debug: bool = False):
-    client = BinanceClient()
+    with TradeLedger() as ledger:
+        _interactive(BinanceClient(), ledger, debug)
+
+def _interactive(client, ledger, debug):
+    sizer = PositionSizer(client)
 
     # Show available balance, assets
     def show_balance():
         account_info = client.get_account_info()
+        ledger.record_snapshot(account_info)
+        sizer.update_account(account_info)
 
         console.print("\n[bold cyan]ACCOUNT SUMMARY[/bold cyan]")
         console.print("="*60)
@@ -81,6 +94,12 @@ def interactive(debug: bool = False):
     console.print(table)
 
     symbol = typer.prompt("Symbol", default="BTCUSDT").upper()
+
+    # Catch up on fills for earlier orders (e.g. resting LIMITs)
+    try:
+        ledger.sync_fills(client, [symbol])
+    except Exception as e:
+        debug_print(console, f"Could not sync fills: {e}", debug)
     
     # 2. Market Snapshot
     mark_price = client.get_mark_price(symbol)
@@ -113,21 +132,32 @@ def interactive(debug: bool = False):
     # 4. Local Validation
     debug_msg = None
     reason = None
+    client_order_id = new_client_order_id()
+    res = None
     try:
         order = OrderInput(symbol=symbol, side=side, order_type=order_type, quantity=quantity, price=price)
         order.normalize_quantities(filters)
         
-        # Margin Check
-        balance, leverage = client.get_balance_and_leverage(symbol) 
+        # Margin Check (cached account snapshot + leverage brackets)
         check_price = order.price if order.price else mark_price
-        notional = order.quantity * check_price
-        required_margin = notional / leverage
+        sizing = sizer.evaluate(symbol, side, order.quantity, check_price)
+
+        if not reduce_only and not sizing["ok"]:
+            if sizing["required_margin"] > sizing["balance"]:
+                console.print(
+                    f"\n[red]INSUFFICIENT MARGIN: Need {sizing['required_margin']:.2f} USDT, Have {sizing['balance']:.2f} USDT[/red]"
+                )
+            else:
+                console.print(
+                    f"\n[red]POSITION ABOVE BRACKET: {sizing['position_notional']:.2f} USDT exceeds {sizing['notional_cap']:.2f} USDT at {sizing['leverage']}x[/red]"
+                )
+            console.print(f"[yellow]Max Qty at {sizing['leverage']}x: {sizing['max_quantity']:.6g}[/yellow]")
+            return
 
-        if not reduce_only and required_margin > balance:
+        if not reduce_only and sizing["liquidation_price"] is not None:
             console.print(
-                f"\n[red]INSUFFICIENT MARGIN: Need {required_margin:.2f} USDT, Have {balance:.2f} USDT[/red]"
+                f"Margin: {sizing['required_margin']:.2f} USDT | Est. Liq. Price: {sizing['liquidation_price']:.6g}"
             )
-            return
 
         errors = order.validate_against_filters(filters, mark_price)
         if errors:
@@ -136,68 +166,208 @@ def interactive(debug: bool = False):
 
         # 5. API Execution
 
-        payload = {
-            "symbol": symbol,
-            "side": side,
-            "type": order_type,
-            "quantity": order.quantity,
-            "reduceOnly": reduce_only
-        }
-
-        if order.order_type == "LIMIT":
-            payload["price"] = order.price
-            payload["timeInForce"] = "GTC" # Mandatory for Limit orders
-
+        payload = build_order_payload(order, reduce_only, client_order_id)
         res = client.place_order(payload)
-        
-        account_info = client.get_account_info()
-        balance = account_info['availableBalance']
-
-        console.print(f"\n[bold green]SUCCESS! Order ID: {res['orderId']}[/bold green]")
+        client_order_id = res.get("clientOrderId", client_order_id)
+        ledger.record_order(
+            symbol=symbol,
+            side=side,
+            order_type=order_type,
+            quantity=order.quantity,
+            price=order.price,
+            status="SUCCESS",
+            order_id=res.get("orderId"),
+            client_order_id=client_order_id,
+            reduce_only=reduce_only
+        )
         log_order(
             symbol=symbol,
             side=side,
             order_type=order_type,
             quantity=order.quantity,
             price=order.price,
-            status="SUCCESS"
+            status="SUCCESS",
+            order_id=res.get("orderId"),
+            client_order_id=client_order_id
         )
+        console.print(f"\n[bold green]SUCCESS! Order ID: {res['orderId']}[/bold green]")
+
+        account_info = client.get_account_info()
+        balance = account_info['availableBalance']
+        ledger.record_snapshot(account_info)
+        sizer.update_account(account_info)
+
+        # Sync the whole symbol rather than this order's trades alone: the
+        # sync cursor is the highest recorded trade id, so inserting only this
+        # order's fills could skip earlier ones that arrived in the meantime
+        try:
+            ledger.sync_fills(client, [symbol])
+        except Exception as e:
+            debug_print(console, f"Could not sync fills: {e}", debug)
          
         dashboard_url = get_testnet_dashboard_url(symbol)
         console.print(f"[cyan]Verify on Binance Testnet Dashboard:[/cyan] {dashboard_url}")
 
     except Exception as e:
-        reason = "REJECT"
-        debug_msg = "Unknown error"
-
-        if isinstance(e.args[0], dict):
-            reason, debug_msg = interpret_binance_error(e.args[0], filters)
-
-        console.print(f"\n[bold red]ORDER FAILED: {reason}[/bold red]")
-
-        try:
-            account_info = client.get_account_info()
-            balance = account_info['availableBalance']
-        except:
-            balance = "unknown"
-
-        log_order(
-            symbol=symbol,
-            side=side,
-            order_type=order_type,
-            quantity=quantity,
-            price=price,
-            status="FAIL",
-            reason=reason,
-            balance=balance
-        )
+        if res is not None:
+            # The order was accepted; only a follow-up call failed
+            debug_print(console, f"Post-order step failed: {e}", debug)
+        else:
+            reason = "REJECT"
+            debug_msg = "Unknown error"
+
+            if isinstance(e.args[0], dict):
+                reason, debug_msg = interpret_binance_error(e.args[0], filters)
+
+            console.print(f"\n[bold red]ORDER FAILED: {reason}[/bold red]")
+
+            try:
+                account_info = client.get_account_info()
+                balance = account_info['availableBalance']
+            except:
+                balance = "unknown"
+
+            log_order(
+                symbol=symbol,
+                side=side,
+                order_type=order_type,
+                quantity=quantity,
+                price=price,
+                status="FAIL",
+                reason=reason,
+                balance=balance,
+                client_order_id=client_order_id
+            )
+            ledger.record_order(
+                symbol=symbol,
+                side=side,
+                order_type=order_type,
+                quantity=quantity,
+                price=price,
+                status="FAIL",
+                client_order_id=client_order_id,
+                reason=reason,
+                detail=debug_msg,
+                reduce_only=reduce_only
+            )
 
-        debug_print(console, debug_msg, debug)
+            debug_print(console, debug_msg, debug)
 
     dashboard_url = get_testnet_dashboard_url(symbol)
     console.print(f"[yellow]Check on Testnet Dashboard:[/yellow] {dashboard_url}")
 
     show_balance()
 
+def parse_since(since):
+    if not since:
+        return None
+    return datetime.strptime(since, "%Y-%m-%d").timestamp()
+
+def print_rows(title, rows, columns):
+    table = Table(title=title)
+    for col in columns:
+        table.add_column(col, style="cyan" if col == columns[0] else "white")
+    for row in rows:
+        table.add_row(*(
+            f"{row[col]:.4f}" if isinstance(row[col], float) else "-" if row[col] is None else str(row[col])
+            for col in columns
+        ))
+    console.print(table)
+
+@ledger_app.command("sync")
+def ledger_sync(symbol: List[str] = typer.Option(None, help="Symbols to sync (default: all traded)")):
+    """Pull fills that arrived after the order was placed."""
+    with TradeLedger() as ledger:
+        fetched = ledger.sync_fills(BinanceClient(), [s.upper() for s in symbol or []] or None)
+    console.print(f"[green]Fetched {fetched} trades[/green]")
+
+@ledger_app.command("pnl")
+def ledger_pnl(symbol: str = None, since: str = typer.Option(None, help="YYYY-MM-DD")):
+    """Realized PnL by symbol."""
+    with TradeLedger() as ledger:
+        rows = ledger.pnl_by_symbol(symbol, parse_since(since))
+    print_rows("PnL by Symbol", rows, ["symbol", "fills", "volume", "realized_pnl", "commission", "net_pnl"])
+
+@ledger_app.command("fill-rate")
+def ledger_fill_rate(symbol: str = None, since: str = typer.Option(None, help="YYYY-MM-DD")):
+    """Share of accepted orders that were filled."""
+    with TradeLedger() as ledger:
+        rows = ledger.fill_rate(symbol, parse_since(since))
+    for row in rows:
+        row["fill_rate"] = f"{row['filled'] / row['accepted']:.1%}" if row["accepted"] else "-"
+    print_rows("Fill Rate", rows, ["symbol", "orders", "accepted", "filled", "fill_rate"])
+
+@ledger_app.command("rejections")
+def ledger_rejections(symbol: str = None, since: str = typer.Option(None, help="YYYY-MM-DD")):
+    """Rejected orders grouped by error category."""
+    with TradeLedger() as ledger:
+        rows = ledger.rejection_reasons(symbol, parse_since(since))
+    print_rows("Rejection Reasons", rows, ["reason", "count", "detail"])
+
+@app.command("dashboard")
+def dashboard(
+    symbols: str = typer.Option(None, help="Comma-separated symbols (default: all)"),
+    fps: float = typer.Option(4.0, min=0.1, max=60.0, help="Maximum redraws per second"),
+    limit: int = typer.Option(None, min=1, help="Maximum rows to show"),
+    positions: bool = typer.Option(True, help="Poll account positions for PnL"),
+):
+    """Live mark price, spread, position and PnL from market streams."""
+    from bot.dashboard import Dashboard
+    from bot.streams import MarketState
+
+    watch = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else None
+    board = Dashboard(MarketState(watch), fps=fps, limit=limit)
+    board.run(client=BinanceClient() if positions else None)
+
+@app.command("strategies")
+def run_strategies(
+    strategy: List[str] = typer.Argument(..., help="Strategy classes as module:Class"),
+    symbols: str = typer.Option(None, help="Comma-separated symbols (default: the strategies' own)"),
+    workers: int = typer.Option(None, help="Worker processes for CPU-bound strategies"),
+    live: bool = typer.Option(False, help="Place real orders instead of a dry run"),
+    stats_interval: float = typer.Option(10.0, help="Seconds between latency reports"),
+):
+    """Run strategy plugins on market streams and report per-strategy latency."""
+    import time
+    from bot.streams import MarketState, MarketStream
+    from bot.strategy import StrategyRunner, load_strategy
+
+    strategies = [load_strategy(path) for path in strategy]
+    if symbols:
+        watch = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    else:
+        watch = sorted({sym.upper() for st in strategies for sym in st.symbols})
+    if not watch:
+        console.print("[red]No symbols: pass --symbols or set them on the strategy[/red]")
+        raise typer.Exit(1)
+
+    with TradeLedger() as ledger, StrategyRunner(
+        strategies, watch, client=BinanceClient(), workers=workers, dry_run=not live, ledger=ledger
+    ) as runner:
+        state = MarketState(watch, listeners=[runner.on_market_event])
+        stream = MarketStream(state)
+        stream.start()
+        console.print(f"[cyan]Running {len(strategies)} strategies on {len(watch)} symbols ({'LIVE' if live else 'dry run'})[/cyan]")
+        try:
+            while True:
+                time.sleep(stats_interval)
+                rows = [{"strategy": name, **stats} for name, stats in runner.summary().items()]
+                print_rows("Strategy Latency (ms)", rows, [
+                    "strategy", "events", "conflated", "intents", "orders", "rejected", "errors",
+                    "compute_p50_ms", "compute_p99_ms", "submit_p50_ms", "submit_p99_ms",
+                ])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # The stream thread calls into the runner, so it must exit first
+            stream.stop()
+            stream.join()
+
+@app.callback(invoke_without_command=True)
+def main(ctx: typer.Context, debug: bool = False):
+    """Starts the interactive order prompt unless a subcommand is given."""
+    if ctx.invoked_subcommand is None:
+        interactive(debug=debug)
+
 if __name__ == "__main__":
-    interactive(debug=False)
\ No newline at end of file
+    app()
\ No newline at end of file
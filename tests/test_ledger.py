@@ -0,0 +1,112 @@
+import pytest
+from bot.ledger import TradeLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    with TradeLedger(tmp_path / "ledger.db") as led:
+        yield led
+
+
+@pytest.mark.ledger
+def test_wal_mode_enabled(ledger):
+    mode = ledger._query("PRAGMA journal_mode")[0]["journal_mode"]
+    assert mode == "wal"
+
+
+@pytest.mark.ledger
+def test_pnl_by_symbol(ledger):
+    ledger.record_fill("BTCUSDT", "BUY", 0.01, 60000, client_order_id="a", commission=0.2)
+    ledger.record_fill("BTCUSDT", "SELL", 0.01, 61000, client_order_id="b", commission=0.2, realized_pnl=10)
+    ledger.record_fill("ETHUSDT", "BUY", 1, 3000, client_order_id="c", commission=0.1)
+    ledger.flush()
+
+    rows = {r["symbol"]: r for r in ledger.pnl_by_symbol()}
+    assert rows["BTCUSDT"]["fills"] == 2
+    assert rows["BTCUSDT"]["net_pnl"] == pytest.approx(9.6)
+    assert rows["ETHUSDT"]["net_pnl"] == pytest.approx(-0.1)
+
+
+@pytest.mark.ledger
+def test_fill_rate(ledger):
+    ledger.record_order("BTCUSDT", "BUY", "LIMIT", 0.01, 60000, client_order_id="a")
+    ledger.record_order("BTCUSDT", "BUY", "LIMIT", 0.01, 59000, client_order_id="b")
+    ledger.record_order("BTCUSDT", "BUY", "LIMIT", 0.01, 1, status="FAIL", client_order_id="c", reason="TICK")
+    ledger.record_fill("BTCUSDT", "BUY", 0.01, 60000, client_order_id="a")
+    ledger.flush()
+
+    row = ledger.fill_rate("btcusdt")[0]
+    assert (row["orders"], row["accepted"], row["filled"]) == (3, 2, 1)
+
+
+@pytest.mark.ledger
+def test_rejection_reasons(ledger):
+    for reason in ["NOTIONAL", "NOTIONAL", "BALANCE"]:
+        ledger.record_order("BTCUSDT", "BUY", "MARKET", 0.001, status="FAIL", reason=reason)
+    ledger.record_order("BTCUSDT", "BUY", "MARKET", 0.01)
+    ledger.flush()
+
+    rows = ledger.rejection_reasons()
+    assert [(r["reason"], r["count"]) for r in rows] == [("NOTIONAL", 2), ("BALANCE", 1)]
+
+
+class MockTradesClient:
+    def __init__(self, trades):
+        self.trades = trades
+        self.calls = []
+
+    def get_user_trades(self, symbol, order_id=None, from_id=None, limit=100):
+        self.calls.append(from_id)
+        return [t for t in self.trades if t["symbol"] == symbol and (from_id is None or t["id"] >= from_id)][:limit]
+
+
+def trade(trade_id, order_id, pnl=0.0):
+    return {"symbol": "BTCUSDT", "id": trade_id, "orderId": order_id, "side": "BUY", "qty": "0.01",
+            "price": "60000", "commission": "0.1", "realizedPnl": str(pnl), "time": 1700000000000}
+
+
+@pytest.mark.ledger
+def test_sync_fills_is_incremental_and_deduplicated(ledger):
+    ledger.record_order("BTCUSDT", "BUY", "LIMIT", 0.01, 60000, order_id=7, client_order_id="late")
+    ledger.record_trades([trade(1, 5)], client_order_id="early")
+    client = MockTradesClient([trade(1, 5), trade(2, 7, pnl=3), trade(3, 7, pnl=2)])
+
+    assert ledger.sync_fills(client) == 2
+    assert client.calls == [2]
+    ledger.sync_fills(client)
+    ledger.record_trades([trade(3, 7)])
+    ledger.flush()
+
+    rows = ledger._query("SELECT trade_id, client_order_id FROM fills ORDER BY trade_id")
+    assert [(r["trade_id"], r["client_order_id"]) for r in rows] == [(1, "early"), (2, "late"), (3, "late")]
+    assert ledger.fill_rate()[0]["filled"] == 1
+
+
+@pytest.mark.ledger
+def test_bad_row_does_not_drop_batch(ledger):
+    ledger.record_order("BTCUSDT", "BUY", "MARKET", 0.01)
+    ledger.record_order(None, "BUY", "MARKET", 0.01)  # violates NOT NULL
+    ledger.record_snapshot({"availableBalance": "10"})
+
+    assert ledger.flush() is False
+    assert len(ledger._query("SELECT * FROM orders")) == 1
+    assert len(ledger._query("SELECT * FROM account_snapshots")) == 1
+    assert ledger.flush() is True
+
+
+@pytest.mark.ledger
+def test_sync_after_order_keeps_earlier_late_fills(ledger):
+    # A resting LIMIT order fills (trade 150) after the startup sync, then a
+    # MARKET order in the same session fills as trade 200
+    ledger.record_order("BTCUSDT", "BUY", "LIMIT", 0.01, 59000, order_id=10, client_order_id="limit")
+    client = MockTradesClient([trade(100, 9)])
+    ledger.sync_fills(client, ["BTCUSDT"])
+
+    client.trades += [trade(150, 10), trade(200, 11)]
+    ledger.record_order("BTCUSDT", "BUY", "MARKET", 0.01, order_id=11, client_order_id="market")
+    ledger.sync_fills(client, ["BTCUSDT"])  # what the CLI does after placing an order
+    ledger.sync_fills(client)
+
+    rows = ledger._query("SELECT trade_id, client_order_id FROM fills ORDER BY trade_id")
+    assert [(r["trade_id"], r["client_order_id"]) for r in rows] == [(100, None), (150, "limit"), (200, "market")]
+    assert ledger.fill_rate()[0]["filled"] == 2
@@ -0,0 +1,99 @@
+import pytest
+from bot.sizing import PositionSizer
+
+BRACKETS = [{
+    "symbol": "BTCUSDT",
+    "brackets": [
+        {"bracket": 1, "initialLeverage": 125, "notionalCap": 50000, "notionalFloor": 0, "maintMarginRatio": 0.004, "cum": 0.0},
+        {"bracket": 2, "initialLeverage": 100, "notionalCap": 250000, "notionalFloor": 50000, "maintMarginRatio": 0.005, "cum": 50.0},
+        {"bracket": 3, "initialLeverage": 50, "notionalCap": 3000000, "notionalFloor": 250000, "maintMarginRatio": 0.01, "cum": 1300.0},
+    ],
+}]
+
+
+class MockBracketClient:
+    def __init__(self):
+        self.calls = 0
+
+    def get_leverage_brackets(self):
+        self.calls += 1
+        return BRACKETS
+
+
+@pytest.fixture
+def sizer():
+    s = PositionSizer(MockBracketClient(), fee_rate=0.0)
+    s.update_account({
+        "availableBalance": "1000",
+        "positions": [{"symbol": "BTCUSDT", "leverage": "10", "isolated": True}],
+    })
+    return s
+
+
+@pytest.mark.sizing
+def test_brackets_fetched_once(sizer):
+    sizer.evaluate("BTCUSDT", "BUY", 0.01, 60000)
+    sizer.evaluate("ETHUSDT", "BUY", 1, 3000)
+    sizer.evaluate("ETHUSDT", "BUY", 1, 3000)
+    assert sizer.client.calls == 1
+
+
+@pytest.mark.sizing
+def test_required_margin_and_max_quantity(sizer):
+    res = sizer.evaluate("BTCUSDT", "BUY", 0.1, 60000)
+    assert res["required_margin"] == pytest.approx(600)
+    assert res["ok"]
+    assert res["max_quantity"] == pytest.approx(10000 / 60000)
+
+
+@pytest.mark.sizing
+def test_notional_cap_by_leverage(sizer):
+    brackets = sizer.get_brackets("BTCUSDT")
+    assert brackets.notional_cap(125) == 50000
+    assert brackets.notional_cap(75) == 250000
+    assert brackets.notional_cap(10) == 3000000
+
+    res = sizer.evaluate("BTCUSDT", "BUY", 1, 60000, balance=10000, leverage=125)
+    assert not res["ok"]
+
+
+@pytest.mark.sizing
+def test_isolated_liquidation_price(sizer):
+    # Long 1 BTC @ 60000 with 6000 margin falls in bracket 2 (mmr 0.005, cum 50)
+    liq = sizer.liquidation_price("BTCUSDT", 1, 60000, 6000)
+    assert liq == pytest.approx((6000 + 50 - 60000) / (0.005 - 1))
+
+    short_liq = sizer.liquidation_price("BTCUSDT", -1, 60000, 6000)
+    assert short_liq > 60000
+
+
+@pytest.mark.sizing
+def test_portfolio_draws_down_balance(sizer):
+    orders = [{"symbol": "BTCUSDT", "side": "BUY", "quantity": 0.1, "price": 60000}] * 2
+    results = sizer.evaluate_portfolio(orders)
+    assert [r["ok"] for r in results] == [True, False]
+
+
+@pytest.mark.sizing
+def test_existing_position_counts_toward_cap(sizer):
+    sizer.update_account({
+        "availableBalance": "10000",
+        "totalWalletBalance": "12000",
+        "positions": [{"symbol": "BTCUSDT", "leverage": "125", "isolated": False,
+                       "positionAmt": "0.8", "entryPrice": "50000"}],
+    })
+    # 40k held + 40k ordered is over the 50k cap at 125x
+    res = sizer.evaluate("BTCUSDT", "BUY", 0.8, 50000)
+    assert res["position_notional"] == pytest.approx(80000)
+    assert not res["ok"]
+    assert res["max_quantity"] == pytest.approx(10000 / 50000)
+
+    # Reducing the position is always allowed and needs no margin
+    res = sizer.evaluate("BTCUSDT", "SELL", 0.5, 50000)
+    assert res["ok"]
+    assert res["required_margin"] == 0
+
+    # Liquidation is estimated on the combined position against the wallet
+    res = sizer.evaluate("BTCUSDT", "BUY", 0.2, 50000)
+    assert res["ok"]
+    assert res["liquidation_price"] == pytest.approx(sizer.liquidation_price("BTCUSDT", 1.0, 50000, 12000))
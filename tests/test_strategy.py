@@ -0,0 +1,232 @@
+import os, sys, subprocess
+import pytest
+import bot.logging_config
+from bot.ledger import TradeLedger
+from bot.streams import SymbolState
+from bot.strategy import MarketBuffer, Strategy, StrategyRunner, OrderIntent, StaleWindowError
+
+FILTERS = [
+    {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000", "stepSize": "0.001"},
+    {"filterType": "PRICE_FILTER", "tickSize": "0.1"},
+    {"filterType": "MIN_NOTIONAL", "notional": "100"},
+]
+
+
+class MockOrderClient:
+    def __init__(self, balance="10000"):
+        self.placed = []
+        self.filter_calls = 0
+        self.account_calls = 0
+        self.balance = balance
+
+    def get_account_info(self):
+        self.account_calls += 1
+        return {"availableBalance": self.balance, "positions": [{"symbol": "BTCUSDT", "leverage": "10"}]}
+
+    def get_leverage_brackets(self):
+        return [{"symbol": "BTCUSDT", "brackets": [
+            {"initialLeverage": 125, "notionalCap": 50000, "notionalFloor": 0, "maintMarginRatio": 0.004, "cum": 0},
+        ]}]
+
+    def get_symbol_filters(self, symbol):
+        self.filter_calls += 1
+        return FILTERS
+
+    def place_order(self, params):
+        self.placed.append(params)
+        return {"orderId": len(self.placed), "clientOrderId": params["newClientOrderId"]}
+
+
+class BuyOnRise(Strategy):
+    lookback = 2
+
+    def on_event(self, symbol, window):
+        if len(window) == 2 and window[1][1] > window[0][1]:
+            return [OrderIntent(symbol=symbol, side="BUY", order_type="MARKET", quantity=0.0105)]
+        return []
+
+
+class HeavyBuyOnRise(BuyOnRise):
+    cpu_bound = True
+
+
+@pytest.fixture(autouse=True)
+def order_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot.logging_config, "ORDER_LOG", tmp_path / "orders.log")
+
+
+def tick(symbol, mark):
+    st = SymbolState(symbol)
+    st.mark, st.bid, st.ask = mark, mark - 0.5, mark + 0.5
+    return st
+
+
+@pytest.mark.strategy
+def test_market_buffer_wraps():
+    buf = MarketBuffer(["BTCUSDT"], capacity=4)
+    try:
+        for n in range(6):
+            head = buf.write(0, n, 100 + n, 99 + n, 101 + n)
+        assert [r[1] for r in buf.window(0, head, 3)] == [103, 104, 105]
+        assert buf.last(0)[1] == 105
+    finally:
+        buf.close()
+
+
+@pytest.mark.strategy
+def test_inline_strategy_places_validated_order():
+    client = MockOrderClient()
+    with StrategyRunner([BuyOnRise()], ["BTCUSDT"], client=client) as runner:
+        runner.on_market_event(tick("BTCUSDT", 60000))
+        runner.on_market_event(tick("BTCUSDT", 60010))
+        runner.on_market_event(tick("ETHUSDT", 3000))
+
+    assert len(client.placed) == 1
+    assert client.placed[0]["quantity"] == 0.01  # normalized to step size
+    stats = runner.summary()["BuyOnRise"]
+    assert (stats["events"], stats["orders"], stats["rejected"]) == (2, 1, 0)
+    assert stats["submit_p50_ms"] is not None
+
+
+@pytest.mark.strategy
+def test_window_detects_overwrite():
+    buf = MarketBuffer(["BTCUSDT"], capacity=4)
+    try:
+        for n in range(10):
+            buf.write(0, n, n, n, n)
+        # Head 5 is long gone: the reader falls forward to the latest rows
+        assert [r[1] for r in buf.window(0, 5, 2)] == [8, 9]
+        with pytest.raises(ValueError):
+            buf.window(0, 10, 4)
+    finally:
+        buf.close()
+
+
+@pytest.mark.strategy
+def test_window_gives_up_when_writer_keeps_lapping():
+    class RacingHeads:
+        """A writer that laps the ring during every copy."""
+        value = 0
+
+        def __getitem__(self, i):
+            self.value += 100
+            return self.value
+
+    buf = MarketBuffer(["BTCUSDT"], capacity=4)
+    shared_heads, buf.heads = buf.heads, RacingHeads()
+    try:
+        with pytest.raises(StaleWindowError):
+            buf.window(0, 1, 1)
+    finally:
+        buf.heads = shared_heads
+        buf.close()
+
+
+@pytest.mark.strategy
+def test_runner_rejects_duplicate_names_and_large_lookback():
+    with pytest.raises(ValueError, match="BuyOnRise"):
+        StrategyRunner([BuyOnRise(), BuyOnRise()], ["BTCUSDT"])
+
+    class Greedy(BuyOnRise):
+        lookback = 600
+
+    with pytest.raises(ValueError, match="lookback"):
+        StrategyRunner([Greedy()], ["BTCUSDT"], capacity=1024)
+
+
+@pytest.mark.strategy
+def test_margin_check_blocks_orders():
+    client = MockOrderClient(balance="100")
+    with StrategyRunner([BuyOnRise()], ["BTCUSDT"], client=client) as runner:
+        for n in range(6):
+            runner.on_market_event(tick("BTCUSDT", 60000 + n * 10))
+
+    # 0.01 BTC at 10x needs ~60 USDT, so only the first of five signals fits
+    assert len(client.placed) == 1
+    assert client.account_calls == 1
+    assert runner.summary()["BuyOnRise"]["rejected"] == 4
+
+
+@pytest.mark.strategy
+def test_events_after_close_are_ignored():
+    runner = StrategyRunner([BuyOnRise()], ["BTCUSDT"], client=MockOrderClient())
+    runner.close()
+    runner.on_market_event(tick("BTCUSDT", 60000))
+    assert runner.summary()["BuyOnRise"]["events"] == 0
+
+
+@pytest.mark.strategy
+def test_filter_violation_is_rejected():
+    client = MockOrderClient()
+    with StrategyRunner([BuyOnRise()], ["BTCUSDT"], client=client) as runner:
+        runner.on_market_event(tick("BTCUSDT", 100))
+        runner.on_market_event(tick("BTCUSDT", 101))  # notional ~1 USDT
+
+    assert client.placed == []
+    assert runner.summary()["BuyOnRise"]["rejected"] == 1
+
+
+@pytest.mark.strategy
+def test_cpu_bound_strategy_runs_in_process_pool():
+    client = MockOrderClient()
+    with StrategyRunner([HeavyBuyOnRise()], ["BTCUSDT"], client=client, workers=1) as runner:
+        runner.on_market_event(tick("BTCUSDT", 60000))
+        assert runner.drain(timeout=30)
+        runner.on_market_event(tick("BTCUSDT", 60010))
+
+    assert len(client.placed) == 1
+    assert runner.summary()["HeavyBuyOnRise"]["compute_p50_ms"] is not None
+
+
+class NoKeysClient(MockOrderClient):
+    def get_account_info(self):
+        self.account_calls += 1
+        raise Exception("API-key format invalid.")
+
+
+@pytest.mark.strategy
+def test_dry_run_skips_records_and_account_errors(tmp_path):
+    client = NoKeysClient()
+    with TradeLedger(tmp_path / "ledger.db") as ledger:
+        with StrategyRunner([BuyOnRise()], ["BTCUSDT"], client=client, dry_run=True, ledger=ledger) as rejecting:
+            for n in range(3):
+                rejecting.on_market_event(tick("BTCUSDT", 100 + n))  # below MIN_NOTIONAL
+        with StrategyRunner([BuyOnRise()], ["BTCUSDT"], client=client, dry_run=True, ledger=ledger) as runner:
+            for n in range(3):
+                runner.on_market_event(tick("BTCUSDT", 60000 + n * 10))
+        ledger.flush()
+        assert ledger.fill_rate() == []
+
+    assert client.placed == []
+    assert client.account_calls == 1
+    assert rejecting.summary()["BuyOnRise"]["rejected"] == 2
+    assert runner.summary()["BuyOnRise"]["orders"] == 2
+    assert not (tmp_path / "orders.log").exists()
+
+
+@pytest.mark.strategy
+def test_pool_count_capped_by_routing_keys():
+    with StrategyRunner([HeavyBuyOnRise()], ["BTCUSDT"], workers=4) as runner:
+        assert len(runner._pools) == 1
+
+
+WORKER_EXIT_SCRIPT = """
+from test_strategy import HeavyBuyOnRise, tick
+from bot.strategy import StrategyRunner
+
+if __name__ == "__main__":
+    with StrategyRunner([HeavyBuyOnRise()], ["BTCUSDT"], workers=1, dry_run=True) as runner:
+        runner.on_market_event(tick("BTCUSDT", 60000))
+        runner.drain(timeout=30)
+"""
+
+
+@pytest.mark.strategy
+def test_worker_exit_is_clean(tmp_path):
+    script = tmp_path / "run_worker.py"
+    script.write_text(WORKER_EXIT_SCRIPT)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.path.join(root, "tests")]))
+    proc = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, env=env, timeout=60)
+    assert proc.returncode == 0
+    assert "BufferError" not in proc.stderr
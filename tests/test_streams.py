@@ -0,0 +1,73 @@
+import threading
+import pytest
+from bot.streams import MarketState, stream_names
+
+
+@pytest.mark.streams
+def test_mark_price_array_updates_state():
+    state = MarketState()
+    state.apply({"stream": "!markPrice@arr@1s", "data": [
+        {"e": "markPriceUpdate", "s": "BTCUSDT", "p": "60000.5"},
+        {"e": "markPriceUpdate", "s": "ETHUSDT", "p": "3000.1"},
+    ]})
+
+    assert state.get("BTCUSDT").mark == 60000.5
+    assert state.drain_dirty() == {"BTCUSDT", "ETHUSDT"}
+    assert state.drain_dirty() == set()
+
+
+@pytest.mark.streams
+def test_book_ticker_spread_and_watchlist():
+    state = MarketState(["btcusdt"])
+    state.apply({"stream": "!bookTicker", "data": {"e": "bookTicker", "s": "BTCUSDT", "b": "100", "a": "100.5"}})
+    state.apply({"stream": "!bookTicker", "data": {"e": "bookTicker", "s": "ETHUSDT", "b": "10", "a": "11"}})
+
+    assert state.get("BTCUSDT").spread == pytest.approx(0.5)
+    assert state.get("ETHUSDT") is None
+
+
+@pytest.mark.streams
+def test_position_pnl_follows_mark():
+    state = MarketState()
+    state.set_positions([
+        {"symbol": "BTCUSDT", "positionAmt": "-0.5", "entryPrice": "60000"},
+        {"symbol": "ETHUSDT", "positionAmt": "0", "entryPrice": "0"},
+    ])
+    state.apply({"e": "markPriceUpdate", "s": "BTCUSDT", "p": "59000"})
+
+    assert state.get("BTCUSDT").pnl == pytest.approx(500)
+    assert state.get("ETHUSDT") is None
+
+
+@pytest.mark.streams
+def test_stream_names_switch_to_all_market():
+    assert stream_names(["BTCUSDT"]) == ["btcusdt@markPrice@1s", "btcusdt@bookTicker"]
+    assert stream_names([f"S{i}USDT" for i in range(150)]) == ["!markPrice@arr@1s", "!bookTicker"]
+
+
+class FailingAccountClient:
+    def __init__(self, until=3):
+        self.calls = 0
+        self.until = until
+        self.done = threading.Event()
+
+    def get_account_info(self):
+        self.calls += 1
+        if self.calls >= self.until:
+            self.done.set()
+        raise Exception("API-key format invalid")
+
+
+@pytest.mark.streams
+def test_position_poller_logs_failure_once(caplog):
+    from bot.dashboard import PositionPoller
+
+    client = FailingAccountClient()
+    poller = PositionPoller(MarketState(), client, interval=0.01)
+    poller.start()
+    assert client.done.wait(timeout=5)
+    poller.stop()
+    poller.join(timeout=5)
+
+    warnings = [r for r in caplog.records if "Position polling failed" in r.message]
+    assert len(warnings) == 1